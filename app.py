@@ -7,6 +7,16 @@ import plotly.graph_objects as go
 import os
 import sys
 import tempfile
+import time
+from archive import DEFAULT_ARCHIVE_DAYS, init_archive, archive_completed_tasks, get_archive_counts
+from backup import (get_backup_dir, load_manifest, create_snapshot, schedule_snapshot,
+                    restore_snapshot, restore_latest, verify_database)
+from reports import (get_days_remaining, init_data_version, init_roadmap_index, build_roadmap_figure,
+                     build_aggregated_figure, ensure_report, get_report_dir, get_data_version,
+                     get_deadline_bounds, count_tasks_in_window, count_tasks_without_deadline, load_tasks_in_window,
+                     load_window_aggregates, choose_granularity)
+from workload import get_people, filter_by_people, compute_workload
+from dedup import build_dedup_index, find_duplicates, index_task
 
 # Configuration de la page
 st.set_page_config(
@@ -44,10 +54,8 @@ def init_db():
         ''')
         conn.commit()
         conn.close()
-        st.success("Base de données initialisée avec succès!")
     except Exception as e:
-        st.error(f"Erreur lors de l'initialisation de la base de données: {str(e)}")
-        sys.exit(1)
+        raise RuntimeError(f"Erreur lors de l'initialisation de la base de données: {str(e)}") from e
 
 # Fonction pour ajouter une tâche
 def add_task(task_name, description, status, responsible, deadline, comments):
@@ -55,10 +63,15 @@ def add_task(task_name, description, status, responsible, deadline, comments):
         db_path = get_db_path()
         conn = sqlite3.connect(db_path)
         c = conn.cursor()
+        # Une tâche créée directement au statut OK est terminée dès aujourd'hui
+        completed_at = datetime.now().strftime('%Y-%m-%d') if status.lower() == 'ok' else None
         c.execute('''
-            INSERT INTO tasks (task_name, description, status, responsible, deadline, comments)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (task_name, description, status, responsible, deadline, comments))
+            INSERT INTO tasks (task_name, description, status, responsible, deadline, comments, completed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (task_name, description, status, responsible, deadline, comments, completed_at))
+        # Indexer la tâche pour la détection des doublons, dans la même transaction
+        # (les tables sont créées par prepare_database)
+        index_task(conn, c.lastrowid, task_name, description)
         conn.commit()
         conn.close()
         return True
@@ -66,17 +79,42 @@ def add_task(task_name, description, status, responsible, deadline, comments):
         st.error(f"Erreur lors de l'ajout de la tâche: {str(e)}")
         return False
 
+# Fonction pour rechercher les tâches identiques ou proches d'une nouvelle tâche
+def find_similar_tasks(task_name, description):
+    conn = sqlite3.connect(get_db_path())
+    try:
+        exact, near = find_duplicates(conn, task_name, description)
+        task_ids = exact + [task_id for task_id, _ in near]
+        if not task_ids:
+            return [], [], []
+        placeholders = ", ".join("?" * len(task_ids))
+        active_names = dict(conn.execute(
+            f"SELECT id, task_name FROM tasks WHERE id IN ({placeholders})", task_ids
+        ).fetchall())
+        archived_names = dict(conn.execute(
+            f"SELECT id, task_name FROM tasks_archive WHERE id IN ({placeholders})", task_ids
+        ).fetchall())
+    finally:
+        conn.close()
+    names = {**archived_names, **active_names}
+    # Seul un doublon exact d'une tâche active est bloquant : une tâche archivée peut être recréée
+    return ([active_names[task_id] for task_id in exact if task_id in active_names],
+            [archived_names[task_id] for task_id in exact if task_id in archived_names],
+            [(names[task_id], similarity) for task_id, similarity in near if task_id in names])
+
 # Fonction pour mettre à jour le statut d'une tâche
 def update_task_status(task_id, new_status):
     try:
         db_path = get_db_path()
         conn = sqlite3.connect(db_path)
         c = conn.cursor()
+        # Mémoriser la date de fin pour l'archivage des tâches terminées
+        completed_at = datetime.now().strftime('%Y-%m-%d') if new_status.lower() == 'ok' else None
         c.execute('''
             UPDATE tasks 
-            SET status = ? 
+            SET status = ?, completed_at = ? 
             WHERE id = ?
-        ''', (new_status, task_id))
+        ''', (new_status, completed_at, task_id))
         conn.commit()
         conn.close()
         return True
@@ -102,18 +140,52 @@ def update_task_comments(task_id, new_comments):
         st.error(f"Erreur lors de la mise à jour des commentaires: {str(e)}")
         return False
 
-# Initialiser la base de données si elle n'existe pas
-try:
-    db_path = get_db_path()
+# Fonction pour préparer la base (restauration, import initial, tables et index annexes)
+# Exécutée une seule fois par processus, et non à chaque réexécution de la page.
+# Aucun appel st.* ici : Streamlit rejouerait les messages à chaque réexécution ; ils sont renvoyés
+@st.cache_resource
+def prepare_database(db_path):
+    messages = []
+    # Base perdue (ex: dossier temporaire vidé sur Streamlit Cloud) : repartir de la dernière sauvegarde
+    if not os.path.exists(db_path) and restore_latest(db_path):
+        messages.append(('info', "Base de données restaurée depuis la dernière sauvegarde."))
     if not os.path.exists(db_path):
         init_db()
+        messages.append(('success', "Base de données initialisée avec succès!"))
         # Importer les tâches initiales
         try:
             from import_tasks import import_tasks
             import_tasks()
-            st.success("Tâches initiales importées avec succès!")
+            messages.append(('success', "Tâches initiales importées avec succès!"))
         except Exception as e:
-            st.error(f"Erreur lors de l'importation des tâches: {str(e)}")
+            messages.append(('error', f"Erreur lors de l'importation des tâches: {str(e)}"))
+    # Créer les tables d'archive si nécessaire
+    conn = sqlite3.connect(db_path)
+    init_archive(conn)
+    init_data_version(conn)
+    init_roadmap_index(conn)
+    # Indexer les tâches existantes pour la détection des doublons (seules les nouvelles sont traitées)
+    build_dedup_index(conn)
+    conn.close()
+    return messages
+
+# Initialiser la base de données si elle n'existe pas
+try:
+    db_path = get_db_path()
+    # Vérification à chaque exécution : si le fichier a disparu en cours de vie du processus,
+    # la préparation (restauration ou création) doit être refaite
+    database_missing = not os.path.exists(db_path)
+    if database_missing:
+        prepare_database.clear()
+        # La base recréée ou restaurée peut reprendre des numéros de version déjà en cache
+        st.cache_data.clear()
+    messages = prepare_database(db_path)
+    # Les messages ne concernent que l'exécution qui a effectivement préparé la base
+    if database_missing:
+        for level, message in messages:
+            getattr(st, level)(message)
+    # Sauvegarde planifiée, en arrière-plan (ignorée si la dernière est récente ou si la base n'a pas changé)
+    schedule_snapshot(db_path)
 except Exception as e:
     st.error(f"Erreur lors de l'initialisation: {str(e)}")
     sys.exit(1)
@@ -127,38 +199,6 @@ st.markdown("""
         background-color: #f8f9fa;
     }
     
-    /* Style des onglets */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2rem;
-        background-color: #ffffff;
-        padding: 1rem;
-        border-radius: 10px;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        height: 4rem;
-        white-space: pre-wrap;
-        background-color: #f8f9fa;
-        border-radius: 8px;
-        gap: 1rem;
-        padding: 1rem;
-        margin: 0.5rem;
-        transition: all 0.3s ease;
-        border: 1px solid #e9ecef;
-    }
-    
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: #e9ecef;
-        transform: translateY(-2px);
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background-color: #007bff;
-        color: white;
-        box-shadow: 0 4px 6px rgba(0,123,255,0.2);
-    }
-    
     /* Style de la sidebar */
     [data-testid="stSidebar"] {
         background-color: #ffffff;
@@ -281,6 +321,69 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Fonction pour mesurer la durée d'exécution d'une partie de la page (page complète ou fragment)
+def record_timing(name, start):
+    timings = st.session_state.setdefault('render_timings', {})
+    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+# Fonction pour charger les tâches (ensemble actif, avec ou sans l'archive)
+# Le cache est indexé par la version des données : il est invalidé à chaque écriture sur `tasks`
+@st.cache_data(max_entries=4)
+def load_tasks(data_version, include_archive=False):
+    conn = sqlite3.connect(get_db_path())
+    query = "SELECT id, task_name, description, status, responsible, deadline, comments, 0 AS archived FROM tasks"
+    if include_archive:
+        query += '''
+            UNION ALL
+            SELECT id, task_name, description, status, responsible, deadline, comments, 1 AS archived
+            FROM tasks_archive
+        '''
+    df = pd.read_sql_query(query, conn)
+    conn.close()
+    return df
+
+# Fonction pour relire une seule tâche (après une modification dans son fragment)
+def load_task(task_id):
+    conn = sqlite3.connect(get_db_path())
+    conn.row_factory = sqlite3.Row
+    row = conn.execute('''
+        SELECT id, task_name, description, status, responsible, deadline, comments, 0 AS archived
+        FROM tasks WHERE id = ?
+    ''', (task_id,)).fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+# Fonction pour compter les tâches par statut directement en SQL
+# Le retard dépend de la date du jour : elle fait partie de la clé du cache
+@st.cache_data(max_entries=4)
+def get_task_counts(data_version, include_archive, today):
+    source = "SELECT status, deadline FROM tasks"
+    if include_archive:
+        source += " UNION ALL SELECT status, deadline FROM tasks_archive"
+    conn = sqlite3.connect(get_db_path())
+    total, completed, in_progress, not_started, overdue = conn.execute(f'''
+        SELECT COUNT(*),
+               COALESCE(SUM(LOWER(status) = 'ok'), 0),
+               COALESCE(SUM(status = 'en cours'), 0),
+               COALESCE(SUM(status = 'non démarré'), 0),
+               COALESCE(SUM(LOWER(status) != 'ok' AND deadline < ?), 0)
+        FROM ({source})
+    ''', (today,)).fetchone()
+    conn.close()
+    # Les tâches archivées sont comptées via les agrégats quand l'archive n'est pas chargée
+    archived_completed = 0 if include_archive else sum(get_archive_counts(get_db_path()).values())
+    return {
+        'total': total + archived_completed,
+        'completed': completed + archived_completed,
+        'in_progress': in_progress,
+        'not_started': not_started,
+        'overdue': overdue
+    }
+
+@st.cache_data(max_entries=4)
+def get_cached_people(data_version, include_archive=False):
+    return get_people(get_db_path(), include_archive)
+
 def get_task_status_color(status):
     return {
         "OK": "success",
@@ -288,15 +391,6 @@ def get_task_status_color(status):
         "non démarré": "urgent"
     }.get(status, "")
 
-def get_days_remaining(deadline):
-    if pd.isna(deadline):
-        return None
-    deadline_date = datetime.strptime(deadline, '%Y-%m-%d')
-    today = datetime.now().date()
-    if deadline_date.date() < today:
-        return None
-    return (deadline_date.date() - today).days
-
 def get_deadline_status(days_remaining, current_status):
     if days_remaining is None:
         if current_status == "OK":
@@ -319,153 +413,165 @@ def get_deadline_comment(days_remaining, current_status):
     else:
         return f"{days_remaining} jours restants"
 
-# Sidebar
-with st.sidebar:
+# Mode lecture seule : servir les rapports précalculés au lieu de reconstruire la page
+if os.environ.get('ROADMAP_READ_ONLY') or st.query_params.get("mode") == "lecture":
+    report = ensure_report(get_db_path())
     st.markdown("""
-        <div style='text-align: center; margin-bottom: 2rem;'>
-            <img src="https://img.icons8.com/fluency/96/task.png" width="80" style='margin-bottom: 1rem;'>
-            <h2 style='color: #2E4053; margin: 0;'>Menu</h2>
-        </div>
+        <h1 style='text-align: center; color: #2E4053; padding: 20px;'>
+            🗺️ Roadmap des Tâches
+        </h1>
     """, unsafe_allow_html=True)
-    st.markdown("---")
-    
-    # Filtres globaux avec style amélioré
-    st.markdown("### 🎯 Filtres")
-    status_filter = st.multiselect(
-        "📊 Statut",
-        ["Tous", "Non démarré", "En cours", "OK"],
-        default=["Tous"]
-    )
-    
-    responsible_filter = st.multiselect(
-        "👥 Responsable",
-        ["Tous", "Youness", "Mehdi", "Salma"],
-        default=["Tous"]
-    )
-    
-    priority_filter = st.multiselect(
-        "⚡ Priorité",
-        ["Tous", "Urgent", "À surveiller", "Dans les temps"],
-        default=["Tous"]
-    )
-    
-    st.markdown("---")
-    st.markdown("### 📈 Statistiques rapides")
-    
-    # Connexion à la base de données
-    conn = sqlite3.connect('roadmap.db')
-    df = pd.read_sql_query("SELECT * FROM tasks", conn)
-    conn.close()
-    
-    # Calcul des statistiques
-    total_tasks = len(df)
-    completed_tasks = len(df[df['status'] == 'OK'])
-    in_progress_tasks = len(df[df['status'] == 'en cours'])
-    not_started_tasks = len(df[df['status'] == 'non démarré'])
-    
-    # Calcul des tâches urgentes
-    urgent_tasks = sum(1 for _, row in df.iterrows() 
-                      if get_days_remaining(row['deadline']) is not None 
-                      and get_days_remaining(row['deadline']) < 0)
-    
+    st.caption(f"Rapport généré le {report['generated_at']}")
+    with open(os.path.join(get_report_dir(), 'roadmap.html'), 'r', encoding='utf-8') as f:
+        st.components.v1.html(f.read(), height=650, scrolling=True)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Tâches terminées", report['stats']['completed'])
+    with col2:
+        st.metric("Tâches en cours", report['stats']['in_progress'])
+    with col3:
+        st.metric("Tâches en attente", report['stats']['not_started'])
+    with col4:
+        st.metric("Tâches en retard", report['stats']['overdue'])
+
+    st.markdown("### ⚠️ Tâches en retard")
+    if report['overdue']:
+        st.dataframe(pd.DataFrame(report['overdue']), hide_index=True, use_container_width=True)
+    else:
+        st.success("✅ Aucune tâche en retard")
+    st.stop()
+
+# Statistiques rapides : dépendent uniquement des compteurs par statut, recalculés
+# seulement quand la version des données ou la date change (pas d'interrogation périodique)
+def render_sidebar_stats(include_archive):
+    start = time.perf_counter()
+    counts = get_task_counts(get_data_version(get_db_path()), include_archive, datetime.now().strftime('%Y-%m-%d'))
+
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Total", total_tasks)
-        st.metric("Terminées", completed_tasks)
+        st.metric("Total", counts['total'])
+        st.metric("Terminées", counts['completed'])
     with col2:
-        st.metric("En cours", in_progress_tasks)
-        st.metric("Non démarrées", not_started_tasks)
-    
+        st.metric("En cours", counts['in_progress'])
+        st.metric("Non démarrées", counts['not_started'])
+
     st.markdown("---")
     st.markdown("### Tâches urgentes")
-    if urgent_tasks > 0:
-        st.error(f"⚠️ {urgent_tasks} tâche(s) en retard")
+    if counts['overdue'] > 0:
+        st.error(f"⚠️ {counts['overdue']} tâche(s) en retard")
     else:
         st.success("✅ Aucune tâche en retard")
 
-# Titre principal avec style
-st.markdown("""
-    <h1 style='text-align: center; color: #2E4053; padding: 20px;'>
-        📊 Tableau de Bord des Tâches
-    </h1>
-""", unsafe_allow_html=True)
+    record_timing('Statistiques', start)
+    with st.expander("⏱️ Temps de rendu (ms)"):
+        st.dataframe(
+            pd.Series(st.session_state.get('render_timings', {}), name='ms'),
+            use_container_width=True
+        )
 
-# Interface principale
-tab1, tab2, tab3 = st.tabs(["📋 Liste des Tâches", "🗺️ Roadmap", "➕ Ajouter une Tâche"])
+# Fragment d'une tâche : une modification des commentaires ne relance que cette ligne ;
+# un changement de statut relance la page, car il modifie les compteurs
+@st.fragment
+def render_task(row):
+    start = time.perf_counter()
+    # Les arguments datent du dernier rendu complet : reprendre la version relue après une modification
+    row = st.session_state['edited_tasks'].get(row['id'], row)
 
-with tab1:
-    # Filtrage des données
-    filtered_df = df.copy()
-    if "Tous" not in status_filter:
-        filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
-    if "Tous" not in responsible_filter:
-        filtered_df = filtered_df[filtered_df['responsible'].str.contains('|'.join(responsible_filter))]
-    
-    # Filtrage par priorité
-    if "Tous" not in priority_filter:
-        filtered_df = filtered_df[filtered_df.apply(lambda row: 
-            ("Urgent" in priority_filter and get_days_remaining(row['deadline']) is not None and get_days_remaining(row['deadline']) < 0) or
-            ("À surveiller" in priority_filter and get_days_remaining(row['deadline']) is not None and 0 <= get_days_remaining(row['deadline']) <= 7) or
-            ("Dans les temps" in priority_filter and (get_days_remaining(row['deadline']) is None or get_days_remaining(row['deadline']) > 7)),
-            axis=1
-        )]
-    
-    # Affichage des tâches avec un design amélioré
-    for _, row in filtered_df.iterrows():
-        days_remaining = get_days_remaining(row['deadline'])
-        priority_class = get_task_status_color(row['status'])
-        
-        with st.expander(f"📌 {row['task_name']}", expanded=False):
-            col1, col2 = st.columns([2,1])
-            with col1:
-                st.markdown(f"**Description:** {row['description']}")
-                
-                # Ajouter un formulaire pour modifier les commentaires
-                with st.form(f"comment_form_{row['id']}"):
-                    new_comments = st.text_area("💬 Commentaires", value=row['comments'], key=f"comments_{row['id']}")
-                    if st.form_submit_button("💾 Mettre à jour les commentaires"):
-                        if update_task_comments(row['id'], new_comments):
-                            st.success("✅ Commentaires mis à jour avec succès!")
-                            st.rerun()
-            
-            with col2:
-                # Ajouter un sélecteur pour modifier le statut
-                with st.form(f"status_form_{row['id']}"):
-                    # Définir les statuts disponibles
-                    status_options = ["non démarré", "en cours", "ok"]
-                    # Trouver l'index du statut actuel
-                    current_status_index = status_options.index(row['status'].lower())
-                    
-                    new_status = st.selectbox(
-                        "📊 Statut",
-                        status_options,
-                        index=current_status_index,
-                        key=f"status_{row['id']}"
-                    )
-                    if st.form_submit_button("🔄 Mettre à jour le statut"):
-                        if update_task_status(row['id'], new_status):
-                            st.success("✅ Statut mis à jour avec succès!")
-                            st.rerun()
-                
-                st.markdown(f"**Responsable:** 👤 {row['responsible']}")
-                
-                if pd.notna(row['deadline']):
-                    days_remaining = get_days_remaining(row['deadline'])
-                    deadline_status = get_deadline_status(days_remaining, row['status'])
-                    deadline_comment = get_deadline_comment(days_remaining, row['status'])
-                    
-                    if deadline_status == "En retard":
-                        st.markdown(f"**Deadline:** 📅 <span class='warning'>{deadline_comment}</span>", unsafe_allow_html=True)
-                    elif deadline_status == "À surveiller":
-                        st.markdown(f"**Deadline:** 📅 <span class='warning'>{deadline_comment}</span>", unsafe_allow_html=True)
-                    elif deadline_status == "Délai respecté":
-                        st.markdown(f"**Deadline:** 📅 <span class='success'>{deadline_comment}</span>", unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"**Deadline:** 📅 <span class='success'>{deadline_comment}</span>", unsafe_allow_html=True)
+    with st.expander(f"📌 {row['task_name']}", expanded=False):
+        col1, col2 = st.columns([2,1])
+        with col1:
+            st.markdown(f"**Description:** {row['description']}")
+
+            # Ajouter un formulaire pour modifier les commentaires
+            with st.form(f"comment_form_{row['id']}"):
+                new_comments = st.text_area("💬 Commentaires", value=row['comments'], key=f"comments_{row['id']}")
+                if st.form_submit_button("💾 Mettre à jour les commentaires"):
+                    if update_task_comments(row['id'], new_comments):
+                        row = load_task(row['id'])
+                        st.session_state['edited_tasks'][row['id']] = row
+                        st.success("✅ Commentaires mis à jour avec succès!")
+
+        with col2:
+            # Ajouter un sélecteur pour modifier le statut
+            with st.form(f"status_form_{row['id']}"):
+                # Définir les statuts disponibles
+                status_options = ["non démarré", "en cours", "ok"]
+                # Trouver l'index du statut actuel
+                current_status_index = status_options.index(row['status'].lower())
+
+                new_status = st.selectbox(
+                    "📊 Statut",
+                    status_options,
+                    index=current_status_index,
+                    key=f"status_{row['id']}"
+                )
+                if st.form_submit_button("🔄 Mettre à jour le statut"):
+                    if new_status == row['status'].lower():
+                        st.info("Statut inchangé")
+                    elif update_task_status(row['id'], new_status):
+                        # Les compteurs changent : réexécution complète, uniquement dans ce cas
+                        st.session_state['status_updated'] = row['id']
+                        st.rerun()
+                if st.session_state.get('status_updated') == row['id']:
+                    del st.session_state['status_updated']
+                    st.success("✅ Statut mis à jour avec succès!")
+
+            st.markdown(f"**Responsable:** 👤 {row['responsible']}")
+
+            if pd.notna(row['deadline']):
+                days_remaining = get_days_remaining(row['deadline'])
+                deadline_status = get_deadline_status(days_remaining, row['status'])
+                deadline_comment = get_deadline_comment(days_remaining, row['status'])
+
+                if deadline_status == "En retard":
+                    st.markdown(f"**Deadline:** 📅 <span class='warning'>{deadline_comment}</span>", unsafe_allow_html=True)
+                elif deadline_status == "À surveiller":
+                    st.markdown(f"**Deadline:** 📅 <span class='warning'>{deadline_comment}</span>", unsafe_allow_html=True)
+                elif deadline_status == "Délai respecté":
+                    st.markdown(f"**Deadline:** 📅 <span class='success'>{deadline_comment}</span>", unsafe_allow_html=True)
                 else:
-                    st.markdown(f"**Deadline:** ⏳ <span class='no-deadline'>Non définie</span>", unsafe_allow_html=True)
+                    st.markdown(f"**Deadline:** 📅 <span class='success'>{deadline_comment}</span>", unsafe_allow_html=True)
+            else:
+                st.markdown(f"**Deadline:** ⏳ <span class='no-deadline'>Non définie</span>", unsafe_allow_html=True)
+    record_timing('Tâche', start)
+
+# Les tâches archivées sont en lecture seule : pas de fragment nécessaire
+def render_archived_task(row):
+    with st.expander(f"📌 {row['task_name']}", expanded=False):
+        col1, col2 = st.columns([2,1])
+        with col1:
+            st.markdown(f"**Description:** {row['description']}")
+            st.markdown(f"**Commentaires:** {row['comments']}")
+        with col2:
+            st.markdown("**Statut:** 🗄️ Archivée")
+            st.markdown(f"**Responsable:** 👤 {row['responsible']}")
+            st.markdown(f"**Deadline:** 📅 {row['deadline'] if pd.notna(row['deadline']) else 'Non définie'}")
+
+# Fragment de la liste des tâches : dépend des tâches filtrées, le changement de page ne relance que la liste
+@st.fragment
+def render_task_list(filtered_df):
+    start = time.perf_counter()
+    tasks_per_page = 25
+    page_count = max(1, -(-len(filtered_df) // tasks_per_page))
+    page = 1
+    if page_count > 1:
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="task_list_page")
+        st.caption(f"{len(filtered_df)} tâche(s), page {page}/{page_count}")
 
-with tab2:
+    # Affichage des tâches avec un design amélioré
+    page_df = filtered_df.iloc[(page - 1) * tasks_per_page:page * tasks_per_page]
+    for row in page_df.to_dict(orient='records'):
+        if row['archived']:
+            render_archived_task(row)
+        else:
+            render_task(row)
+    record_timing('Liste des tâches', start)
+
+# Fragment de la Roadmap : dépend des tâches de la fenêtre affichée et des compteurs par statut
+@st.fragment
+def render_roadmap(include_archive):
+    start = time.perf_counter()
     st.markdown("""
         <style>
         .roadmap-title {
@@ -482,207 +588,295 @@ with tab2:
         <h1 class="roadmap-title">🗺️ Roadmap des Tâches</h1>
     """, unsafe_allow_html=True)
 
-    # Création du graphique Gantt
-    fig = go.Figure()
-    
-    # Couleurs pour les différents statuts
-    colors = {
-        'ok': '#007bff',       # Bleu pour les tâches terminées
-        'en cours': '#ffc107',  # Jaune pour les tâches en cours
-        'non démarré': '#28a745'  # Vert pour les tâches non démarrées
-    }
-    
-    # Calculer la plage de dates pour l'axe X
-    min_date = None
-    max_date = None
-    today = datetime.now().date()
-    
-    # Trouver la première et la dernière date dans les deadlines
-    for _, task in df.iterrows():
-        if pd.notna(task['deadline']):
-            deadline = datetime.strptime(task['deadline'], '%Y-%m-%d').date()
-            if min_date is None or deadline < min_date:
-                min_date = deadline
-            if max_date is None or deadline > max_date:
-                max_date = deadline
-    
-    # Si aucune date n'est trouvée, utiliser la date d'aujourd'hui
-    if min_date is None:
-        min_date = today
-    if max_date is None:
-        max_date = min_date + timedelta(days=30)
+    # Fenêtre de dates affichée (par défaut : toutes les deadlines, +30 jours)
+    min_deadline, max_deadline = get_deadline_bounds(get_db_path(), include_archive)
+    default_start = min_deadline or datetime.now().date()
+    default_end = (max_deadline or default_start) + timedelta(days=30)
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        window = st.date_input("📅 Période affichée", value=(default_start, default_end))
+    # Tant que la seconde date n'est pas choisie, garder la fenêtre par défaut
+    window_start, window_end = window if len(window) == 2 else (default_start, default_end)
+    granularity = choose_granularity(window_start, window_end)
+
+    if granularity:
+        # Fenêtre large : barres agrégées par semaine ou par mois
+        aggregates = load_window_aggregates(get_db_path(), window_start, window_end, granularity, include_archive)
+        fig = build_aggregated_figure(aggregates, window_start, window_end, granularity)
+        st.caption(f"Période longue : affichage agrégé par {'semaine' if granularity == 'W' else 'mois'}")
     else:
-        # Ajouter 30 jours à la date maximale pour la visualisation
-        max_date = max_date + timedelta(days=30)
-    
-    # Créer les dates pour l'axe X
-    date_range = pd.date_range(start=min_date, end=max_date, freq='D')
-    
-    # Trier les tâches par date de deadline
-    sorted_tasks = df.sort_values(by='deadline')
-    
-    # Ajout des tâches au graphique
-    for _, task in sorted_tasks.iterrows():
-        # Déterminer la couleur et le style en fonction du statut
-        task_status = task['status'].lower()  # Convertir en minuscules
-        
-        # Calculer la durée de la barre
-        start_date = min_date
-        if pd.notna(task['deadline']):
-            deadline = datetime.strptime(task['deadline'], '%Y-%m-%d')
-            days_remaining = get_days_remaining(task['deadline'])
-            if task_status == 'ok':
-                end_date = deadline.date()
-            else:
-                end_date = min(today, deadline.date())
-        else:
-            # Pour les tâches sans deadline, utiliser la date d'aujourd'hui
-            end_date = today
-            days_remaining = None
-        
-        # S'assurer que la durée est au moins de 1 jour
-        duration = max(1, (end_date - start_date).days)
-        
-        # Déterminer la couleur et le texte du statut
-        if task_status == 'ok':
-            color = colors['ok']  # Bleu pour les tâches terminées
-            status_text = "✅ Déployé"
-            progress_text = "Tâche terminée"
-        elif task_status == 'en cours':
-            color = colors['en cours']  # Jaune pour les tâches en cours
-            status_text = "🔄 En cours"
-            progress_text = f"Jours restants: {days_remaining}" if days_remaining is not None else "En retard"
-        else:
-            color = colors['non démarré']  # Couleur par défaut pour les autres statuts
-            status_text = "⏳ En attente" if task_status == 'non démarré' else "⚠️ En retard"
-            progress_text = f"Jours restants: {days_remaining}" if days_remaining is not None else "En retard"
-        
-        # Ajouter la barre
-        fig.add_trace(go.Bar(
-            x=[duration],
-            y=[task['task_name']],
-            orientation='h',
-            name=task['task_name'],
-            marker_color=color,
-            width=0.8,
-            text=None,  # Enlever le texte sur la barre
-            hovertemplate=f"""
-                <b>{task['task_name']}</b><br>
-                Deadline: {task['deadline'] if pd.notna(task['deadline']) else 'Non définie'}<br>
-                Responsable: {task['responsible']}<br>
-                Statut: {status_text}<br>
-                {progress_text}
-            <extra></extra>
-            """
-        ))
-    
-    # Mise à jour du layout avec les dates
-    fig.update_layout(
-        title={
-            'text': "Timeline des Tâches",
-            'y':0.95,
-            'x':0.5,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': {'size': 24, 'color': '#2E4053'}
-        },
-        xaxis_title="Dates",
-        yaxis_title="Tâches",
-        showlegend=False,
-        height=600,
-        template="plotly_white",
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        xaxis=dict(
-            tickmode='array',
-            ticktext=[d.strftime('%d/%m/%Y') for d in date_range[::7]],  # Afficher une date par semaine
-            tickvals=list(range(0, len(date_range), 7)),
-            tickangle=45,
-            gridcolor='rgba(0,0,0,0.1)',
-            zerolinecolor='rgba(0,0,0,0.1)',
-            range=[0, max(30, len(date_range))]  # Assurer une largeur minimale
-        ),
-        yaxis=dict(
-            gridcolor='rgba(0,0,0,0.1)',
-            zerolinecolor='rgba(0,0,0,0.1)'
-        ),
-        margin=dict(l=20, r=20, t=100, b=20)
-    )
-    
-    # Ajouter une ligne verticale pour la date d'aujourd'hui
-    if min_date <= today <= max_date:
-        today_index = (today - min_date).days
-        fig.add_vline(
-            x=today_index,
-            line_dash="dash",
-            line_color="red",
-            annotation_text="Aujourd'hui",
-            annotation_position="top right",
-            annotation=dict(
-                font=dict(size=12, color="red"),
-                bgcolor="white",
-                bordercolor="red",
-                borderwidth=1
-            )
+        # Fenêtre courte : seules les tâches visibles sont chargées, page par page
+        window_count = count_tasks_in_window(get_db_path(), window_start, window_end, include_archive)
+        with col2:
+            rows_per_page = st.selectbox("Tâches par page", [25, 50, 100], index=0)
+        page_count = max(1, -(-window_count // rows_per_page))
+        with col3:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        window_df = load_tasks_in_window(
+            get_db_path(), window_start, window_end,
+            rows_per_page, (page - 1) * rows_per_page, include_archive
         )
-    
-    # Ajouter une légende pour les statuts
-    fig.add_annotation(
-        x=0.5,
-        y=1.1,
-        xref="paper",
-        yref="paper",
-        text="<b>Légende:</b> ✅ Déployé | 🔄 En cours | ⏳ En attente | ⚠️ En retard",
-        showarrow=False,
-        font=dict(size=12, color="#2E4053"),
-        bgcolor="white",
-        bordercolor="#2E4053",
-        borderwidth=1,
-        borderpad=4
-    )
-    
+        fig = build_roadmap_figure(window_df, window_start, window_end)
+        fig.update_layout(height=max(400, 150 + 30 * len(window_df)))
+        st.caption(f"{window_count} tâche(s) sur la période, page {page}/{page_count}")
+
+    no_deadline_count = count_tasks_without_deadline(get_db_path(), include_archive)
+    if no_deadline_count:
+        st.caption(f"⏳ {no_deadline_count} tâche(s) sans deadline ne figurent pas sur la timeline")
+
     st.plotly_chart(fig, use_container_width=True)
-    
+
     # Ajouter des statistiques sous la Timeline
+    counts = get_task_counts(get_data_version(get_db_path()), include_archive, datetime.now().strftime('%Y-%m-%d'))
     col1, col2, col3, col4 = st.columns(4)
-    
+
     with col1:
-        st.metric("Tâches terminées", len(df[df['status'] == 'OK']))
+        st.metric("Tâches terminées", counts['completed'])
     with col2:
-        st.metric("Tâches en cours", len(df[df['status'] == 'en cours']))
+        st.metric("Tâches en cours", counts['in_progress'])
     with col3:
-        st.metric("Tâches en attente", len(df[df['status'] == 'non démarré']))
+        st.metric("Tâches en attente", counts['not_started'])
     with col4:
-        st.metric("Tâches en retard", len(df[(df['status'] != 'OK') & (df['deadline'].apply(lambda x: pd.notna(x) and datetime.strptime(x, '%Y-%m-%d').date() < today))]))
+        st.metric("Tâches en retard", counts['overdue'])
+    record_timing('Roadmap', start)
 
-with tab3:
+# Fragment du formulaire d'ajout : dépend uniquement de la liste des responsables
+@st.fragment
+def render_add_task_form(people):
+    start = time.perf_counter()
     st.subheader("Ajouter une nouvelle tâche")
-    
+
     with st.form("new_task_form"):
         task_name = st.text_input("📝 Nom de la tâche")
         description = st.text_area("📄 Description")
-        
+
         col1, col2 = st.columns(2)
         with col1:
             status = st.selectbox("📊 Statut", ["Non démarré", "En cours", "OK"])
-            responsible = st.multiselect("👥 Responsable(s)", ["Youness", "Mehdi", "Salma"])
+            responsible = st.multiselect("👥 Responsable(s)", people)
+            other_responsible = st.text_input("➕ Autre(s) responsable(s)", help="Noms séparés par des virgules")
         with col2:
             has_deadline = st.checkbox("📅 Définir une deadline", value=True)
             deadline = st.date_input("📅 Deadline", disabled=not has_deadline) if has_deadline else None
             comments = st.text_area("💬 Commentaires")
-        
+
+        force_add = st.checkbox("Ajouter même si une tâche similaire existe")
         submitted = st.form_submit_button("➕ Ajouter la tâche")
-        
+
         if submitted:
+            responsible = responsible + [name.strip() for name in other_responsible.split(",") if name.strip()]
             if not task_name or not description or not responsible:
                 st.error("⚠️ Veuillez remplir tous les champs obligatoires")
             else:
-                add_task(
+                exact_duplicates, archived_duplicates, near_duplicates = find_similar_tasks(task_name, description)
+                if exact_duplicates:
+                    st.error(f"⚠️ Cette tâche existe déjà : {', '.join(exact_duplicates)}")
+                elif (archived_duplicates or near_duplicates) and not force_add:
+                    st.warning("⚠️ Des tâches similaires existent déjà :\n\n" + "\n".join(
+                        [f"- {name} (identique, archivée)" for name in archived_duplicates] +
+                        [f"- {name} ({similarity:.0%} de similarité)" for name, similarity in near_duplicates]
+                    ) + "\n\nCochez « Ajouter même si une tâche similaire existe » pour confirmer.")
+                elif add_task(
                     task_name,
                     description,
                     status,
                     ", ".join(responsible),
                     deadline.strftime("%Y-%m-%d") if has_deadline and deadline else None,
                     comments
-                )
-                st.success("✅ Tâche ajoutée avec succès!") 
\ No newline at end of file
+                ):
+                    st.success("✅ Tâche ajoutée avec succès!")
+    record_timing('Ajout de tâche', start)
+
+# Fragment de la charge de travail : dépend de l'ensemble des tâches chargées
+@st.fragment
+def render_workload(df):
+    start = time.perf_counter()
+    st.subheader("Charge de travail par responsable")
+
+    workload_summary, weekly_load = compute_workload(df)
+
+    if workload_summary.empty:
+        st.info("Aucune tâche ouverte")
+    else:
+        st.dataframe(
+            workload_summary.rename(columns={
+                'open_tasks': 'Tâches ouvertes',
+                'overdue_tasks': 'Tâches en retard'
+            }),
+            use_container_width=True
+        )
+
+        if not weekly_load.empty:
+            # Carte de chaleur : deadlines ouvertes par personne et par semaine
+            heatmap = go.Figure(go.Heatmap(
+                z=weekly_load.values,
+                x=weekly_load.columns,
+                y=weekly_load.index,
+                colorscale='YlOrRd',
+                hovertemplate="<b>%{y}</b><br>Semaine du %{x|%d/%m/%Y}<br>Deadlines: %{z}<extra></extra>"
+            ))
+            heatmap.update_layout(
+                title="Deadlines ouvertes par semaine",
+                xaxis_title="Semaine",
+                yaxis_title="Responsable",
+                template="plotly_white",
+                height=max(300, 30 * len(weekly_load.index)),
+                margin=dict(l=20, r=20, t=60, b=20)
+            )
+            st.plotly_chart(heatmap, use_container_width=True)
+    record_timing('Charge de travail', start)
+
+# Rendu complet de la page : les versions relues par les fragments de tâche sont remplacées par les données fraîches
+page_start = time.perf_counter()
+st.session_state['edited_tasks'] = {}
+
+# Sidebar
+with st.sidebar:
+    st.markdown("""
+        <div style='text-align: center; margin-bottom: 2rem;'>
+            <img src="https://img.icons8.com/fluency/96/task.png" width="80" style='margin-bottom: 1rem;'>
+            <h2 style='color: #2E4053; margin: 0;'>Menu</h2>
+        </div>
+    """, unsafe_allow_html=True)
+    st.markdown("---")
+
+    # Filtres globaux avec style amélioré
+    st.markdown("### 🎯 Filtres")
+    status_filter = st.multiselect(
+        "📊 Statut",
+        ["Tous", "Non démarré", "En cours", "OK"],
+        default=["Tous"]
+    )
+
+    include_archive = st.checkbox("🗄️ Inclure l'archive", value=False)
+
+    # Liste des responsables issue des données
+    people = get_cached_people(get_data_version(get_db_path()), include_archive)
+
+    responsible_filter = st.multiselect(
+        "👥 Responsable",
+        ["Tous"] + people,
+        default=["Tous"]
+    )
+
+    priority_filter = st.multiselect(
+        "⚡ Priorité",
+        ["Tous", "Urgent", "À surveiller", "Dans les temps"],
+        default=["Tous"]
+    )
+
+    st.markdown("---")
+    st.markdown("### 🗄️ Archivage")
+    archive_days = st.number_input(
+        "Archiver les tâches terminées depuis plus de (jours)",
+        min_value=0,
+        value=DEFAULT_ARCHIVE_DAYS,
+        step=30
+    )
+
+    # Archivage automatique, une fois par session
+    if 'auto_archive_done' not in st.session_state:
+        try:
+            archive_completed_tasks(get_db_path(), DEFAULT_ARCHIVE_DAYS)
+        except Exception as e:
+            st.error(f"Erreur lors de l'archivage automatique: {str(e)}")
+        st.session_state['auto_archive_done'] = True
+
+    if st.button("🗄️ Archiver maintenant"):
+        try:
+            archived = archive_completed_tasks(get_db_path(), int(archive_days))
+            st.success(f"✅ {archived} tâche(s) archivée(s)")
+        except Exception as e:
+            st.error(f"Erreur lors de l'archivage: {str(e)}")
+
+    st.markdown("---")
+    st.markdown("### 💾 Sauvegardes")
+    if st.button("💾 Sauvegarder maintenant"):
+        try:
+            entry = create_snapshot(get_db_path())
+            st.success(f"✅ Sauvegarde créée en {entry['duration_ms']} ms (verrou tenu au plus {entry['max_step_ms']} ms d'affilée)")
+        except Exception as e:
+            st.error(f"Erreur lors de la sauvegarde: {str(e)}")
+
+    backups = load_manifest(get_backup_dir())
+    if backups:
+        with st.expander("🕒 Historique des sauvegardes"):
+            st.dataframe(
+                pd.DataFrame(backups).reindex(columns=['created_at', 'duration_ms', 'max_step_ms', 'total_lock_ms', 'size', 'verified']),
+                hide_index=True
+            )
+            selected_backup = st.selectbox(
+                "Sauvegarde",
+                [entry['file'] for entry in reversed(backups)]
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("🔍 Vérifier"):
+                    if verify_database(os.path.join(get_backup_dir(), selected_backup)):
+                        st.success("✅ Intégrité vérifiée")
+                    else:
+                        st.error("⚠️ Sauvegarde corrompue")
+            with col2:
+                if st.button("♻️ Restaurer"):
+                    try:
+                        restore_snapshot(get_db_path(), selected_backup)
+                        # Les données en cache ne correspondent plus à la base restaurée
+                        st.cache_data.clear()
+                        st.success("✅ Base restaurée")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erreur lors de la restauration: {str(e)}")
+
+    st.markdown("---")
+    st.markdown("### 📈 Statistiques rapides")
+    render_sidebar_stats(include_archive)
+
+# Titre principal avec style
+st.markdown("""
+    <h1 style='text-align: center; color: #2E4053; padding: 20px;'>
+        📊 Tableau de Bord des Tâches
+    </h1>
+""", unsafe_allow_html=True)
+
+# Interface principale : seule la vue sélectionnée est calculée (contrairement à st.tabs qui exécute tous les onglets)
+active_view = st.radio(
+    "Vue",
+    ["📋 Liste des Tâches", "🗺️ Roadmap", "➕ Ajouter une Tâche", "👥 Charge de travail"],
+    horizontal=True,
+    label_visibility="collapsed",
+    key="active_view"
+)
+
+if active_view == "📋 Liste des Tâches":
+    # Chargement des tâches (ensemble actif uniquement, sauf si l'archive est demandée)
+    df = load_tasks(get_data_version(get_db_path()), include_archive)
+
+    # Filtrage des données
+    filtered_df = df.copy()
+    if "Tous" not in status_filter:
+        filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
+    if "Tous" not in responsible_filter:
+        filtered_df = filter_by_people(filtered_df, responsible_filter)
+
+    # Filtrage par priorité
+    if "Tous" not in priority_filter:
+        filtered_df = filtered_df[filtered_df.apply(lambda row:
+            ("Urgent" in priority_filter and get_days_remaining(row['deadline']) is not None and get_days_remaining(row['deadline']) < 0) or
+            ("À surveiller" in priority_filter and get_days_remaining(row['deadline']) is not None and 0 <= get_days_remaining(row['deadline']) <= 7) or
+            ("Dans les temps" in priority_filter and (get_days_remaining(row['deadline']) is None or get_days_remaining(row['deadline']) > 7)),
+            axis=1
+        )]
+
+    render_task_list(filtered_df)
+
+elif active_view == "🗺️ Roadmap":
+    render_roadmap(include_archive)
+
+elif active_view == "➕ Ajouter une Tâche":
+    render_add_task_form(people)
+
+else:
+    render_workload(load_tasks(get_data_version(get_db_path()), include_archive))
+
+record_timing('Page complète', page_start)
@@ -0,0 +1,93 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+# Nombre de jours par défaut avant qu'une tâche terminée ne soit archivée
+DEFAULT_ARCHIVE_DAYS = 90
+
+# Fonction pour créer les tables d'archive et les agrégats historiques
+def init_archive(conn):
+    c = conn.cursor()
+    # Date de fin réelle des tâches (renseignée au passage au statut OK)
+    columns = [row[1] for row in c.execute("PRAGMA table_info(tasks)")]
+    if 'completed_at' not in columns:
+        c.execute("ALTER TABLE tasks ADD COLUMN completed_at TEXT")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            id INTEGER PRIMARY KEY,
+            task_name TEXT NOT NULL,
+            description TEXT,
+            status TEXT,
+            responsible TEXT,
+            deadline TEXT,
+            comments TEXT,
+            completed_at TEXT,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+    # Agrégats des tâches archivées, pour garder des compteurs historiques justes
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS archive_rollups (
+            status TEXT NOT NULL,
+            month TEXT NOT NULL,
+            task_count INTEGER NOT NULL,
+            PRIMARY KEY (status, month)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)")
+    conn.commit()
+
+# Fonction pour déplacer les tâches terminées depuis plus de `days` jours vers l'archive
+def archive_completed_tasks(db_path, days=DEFAULT_ARCHIVE_DAYS):
+    cutoff = (datetime.now().date() - timedelta(days=days)).strftime('%Y-%m-%d')
+    archived_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    # Les anciennes tâches n'ont pas de date de fin : la deadline sert alors de référence
+    condition = '''
+        LOWER(status) = 'ok'
+        AND COALESCE(completed_at, deadline) IS NOT NULL
+        AND COALESCE(completed_at, deadline) < ?
+    '''
+    conn = sqlite3.connect(db_path)
+    try:
+        init_archive(conn)
+        c = conn.cursor()
+        c.execute('BEGIN')
+        c.execute(f'''
+            INSERT INTO archive_rollups (status, month, task_count)
+            SELECT 'OK', SUBSTR(COALESCE(completed_at, deadline), 1, 7), COUNT(*)
+            FROM tasks
+            WHERE {condition}
+            GROUP BY SUBSTR(COALESCE(completed_at, deadline), 1, 7)
+            ON CONFLICT (status, month) DO UPDATE
+            SET task_count = task_count + excluded.task_count
+        ''', (cutoff,))
+        c.execute(f'''
+            INSERT INTO tasks_archive (id, task_name, description, status, responsible,
+                                       deadline, comments, completed_at, archived_at)
+            SELECT id, task_name, description, status, responsible,
+                   deadline, comments, completed_at, ?
+            FROM tasks
+            WHERE {condition}
+        ''', (archived_at, cutoff))
+        c.execute(f"DELETE FROM tasks WHERE {condition}", (cutoff,))
+        archived = c.rowcount
+        conn.commit()
+        return archived
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# Fonction pour lire le nombre de tâches archivées par statut (depuis les agrégats)
+def get_archive_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        init_archive(conn)
+        rows = conn.execute('''
+            SELECT status, SUM(task_count)
+            FROM archive_rollups
+            GROUP BY status
+        ''').fetchall()
+        return {status: count for status, count in rows}
+    finally:
+        conn.close()
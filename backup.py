@@ -0,0 +1,211 @@
+import sqlite3
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+
+# Nombre de pages copiées à chaque étape : le verrou n'est tenu que le temps d'une étape
+BACKUP_PAGES_PER_STEP = 64
+# Pause entre deux étapes, verrou relâché, pour laisser passer les écritures de l'application
+BACKUP_STEP_SLEEP = 0.005
+# Nombre de sauvegardes conservées par défaut
+DEFAULT_RETENTION = 10
+# Intervalle par défaut entre deux sauvegardes automatiques
+DEFAULT_BACKUP_INTERVAL_HOURS = 6
+
+MANIFEST_NAME = 'manifest.json'
+# Délai minimal entre deux vérifications de la sauvegarde planifiée
+SCHEDULE_CHECK_SECONDS = 60
+
+# Verrous du processus : une seule sauvegarde planifiée à la fois, et un seul écrivain du manifeste
+_snapshot_lock = threading.Lock()
+_manifest_lock = threading.Lock()
+_last_schedule_check = [0.0]
+
+# Fonction pour obtenir le dossier des sauvegardes
+def get_backup_dir():
+    return os.environ.get('ROADMAP_BACKUP_DIR', 'backups')
+
+# Fonction pour lire le manifeste des sauvegardes (plus récente en dernier)
+def load_manifest(backup_dir):
+    path = os.path.join(backup_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(backup_dir, entries):
+    path = os.path.join(backup_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+# Fonction pour copier une base avec l'API de sauvegarde en ligne, par petites étapes
+def copy_database(src_path, dst_path, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+    step_durations = []
+    step_start = [None]
+
+    # Appelée par sqlite3 juste après chaque étape : la durée mesurée ne couvre que backup_step(),
+    # c'est-à-dire le temps pendant lequel le verrou sur la base source est tenu
+    def progress(status, remaining, total):
+        step_durations.append(time.perf_counter() - step_start[0])
+        # La pause est faite ici, verrou relâché, et exclue de la mesure de l'étape suivante
+        if remaining:
+            time.sleep(sleep)
+        step_start[0] = time.perf_counter()
+
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dst_path)
+    try:
+        start = time.perf_counter()
+        step_start[0] = start
+        # Le paramètre `sleep` de sqlite3 ne s'applique qu'en cas de base occupée
+        src.backup(dst, pages=pages, progress=progress, sleep=sleep)
+        duration = time.perf_counter() - start
+    finally:
+        dst.close()
+        src.close()
+    return {
+        'duration_ms': round(duration * 1000, 2),
+        'steps': len(step_durations),
+        # Plus longue étape verrou tenu : délai maximal ajouté à une écriture concurrente
+        'max_step_ms': round(max(step_durations, default=0) * 1000, 2),
+        'total_lock_ms': round(sum(step_durations) * 1000, 2)
+    }
+
+# Fonction pour vérifier l'intégrité d'une base
+def verify_database(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    return result == 'ok'
+
+# Fonction pour créer une sauvegarde de la base
+def create_snapshot(db_path, backup_dir=None, retention=DEFAULT_RETENTION):
+    backup_dir = backup_dir or get_backup_dir()
+    os.makedirs(backup_dir, exist_ok=True)
+    created_at = datetime.now()
+    file_name = f"roadmap_{created_at.strftime('%Y%m%d_%H%M%S_%f')}.db"
+    snapshot_path = os.path.join(backup_dir, file_name)
+
+    stats = copy_database(db_path, snapshot_path)
+    entry = {
+        'file': file_name,
+        'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'source_mtime': os.path.getmtime(db_path),
+        'size': os.path.getsize(snapshot_path),
+        'verified': verify_database(snapshot_path),
+        **stats
+    }
+
+    # Lecture, ajout et écriture du manifeste sans qu'une autre sauvegarde ne s'intercale
+    with _manifest_lock:
+        entries = load_manifest(backup_dir)
+        entries.append(entry)
+        entries = apply_retention(backup_dir, entries, retention)
+        save_manifest(backup_dir, entries)
+    return entry
+
+# Fonction pour supprimer les sauvegardes au-delà de la politique de rétention
+def apply_retention(backup_dir, entries, retention=DEFAULT_RETENTION):
+    if retention is None or len(entries) <= retention:
+        return entries
+    for entry in entries[:-retention]:
+        path = os.path.join(backup_dir, entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+    return entries[-retention:]
+
+# Fonction pour créer une sauvegarde si la dernière est trop ancienne et que la base a changé
+def maybe_snapshot(db_path, backup_dir=None, interval_hours=DEFAULT_BACKUP_INTERVAL_HOURS,
+                   retention=DEFAULT_RETENTION):
+    backup_dir = backup_dir or get_backup_dir()
+    if not os.path.exists(db_path):
+        return None
+    entries = load_manifest(backup_dir)
+    if entries:
+        last = entries[-1]
+        last_time = datetime.strptime(last['created_at'], '%Y-%m-%d %H:%M:%S')
+        if datetime.now() - last_time < timedelta(hours=interval_hours):
+            return None
+        # Aucune modification depuis la dernière sauvegarde : inutile d'en refaire une
+        if os.path.getmtime(db_path) == last.get('source_mtime'):
+            return None
+    return create_snapshot(db_path, backup_dir, retention)
+
+# Fonction pour lancer la sauvegarde planifiée en arrière-plan, hors du rendu de la page
+def schedule_snapshot(db_path, backup_dir=None, interval_hours=DEFAULT_BACKUP_INTERVAL_HOURS,
+                      retention=DEFAULT_RETENTION):
+    now = time.monotonic()
+    if now - _last_schedule_check[0] < SCHEDULE_CHECK_SECONDS:
+        return False
+    # Une sauvegarde est déjà en cours dans ce processus : rien à lancer
+    if not _snapshot_lock.acquire(blocking=False):
+        return False
+    _last_schedule_check[0] = now
+
+    def run():
+        try:
+            maybe_snapshot(db_path, backup_dir, interval_hours, retention)
+        except Exception as e:
+            print(f"Sauvegarde automatique impossible: {str(e)}")
+        finally:
+            _snapshot_lock.release()
+
+    threading.Thread(target=run, name='roadmap-backup', daemon=True).start()
+    return True
+
+# Fonction pour restaurer une sauvegarde dans la base active
+def restore_snapshot(db_path, file_name, backup_dir=None):
+    backup_dir = backup_dir or get_backup_dir()
+    snapshot_path = os.path.join(backup_dir, file_name)
+    if not os.path.exists(snapshot_path):
+        raise FileNotFoundError(f"Sauvegarde introuvable: {file_name}")
+    if not verify_database(snapshot_path):
+        raise ValueError(f"La sauvegarde {file_name} est corrompue")
+    previous_version = read_data_version(db_path) if os.path.exists(db_path) else None
+    stats = copy_database(snapshot_path, db_path)
+    # La sauvegarde ramène son ancien numéro de version : le placer après celui d'avant la restauration,
+    # sinon une écriture suivante réutiliserait un numéro déjà associé à d'autres données en cache
+    restored_version = read_data_version(db_path)
+    if restored_version is not None:
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute(
+                "UPDATE data_version SET version = ? WHERE id = 1",
+                (max(restored_version, previous_version or 0) + 1,)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return stats
+
+# Fonction pour lire le compteur de version des données (None si la table n'existe pas)
+def read_data_version(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+        return row[0] if row else None
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+# Fonction pour restaurer la sauvegarde valide la plus récente
+def restore_latest(db_path, backup_dir=None):
+    backup_dir = backup_dir or get_backup_dir()
+    for entry in reversed(load_manifest(backup_dir)):
+        if entry.get('verified') and os.path.exists(os.path.join(backup_dir, entry['file'])):
+            restore_snapshot(db_path, entry['file'], backup_dir)
+            return entry
+    return None
+
+if __name__ == "__main__":
+    from import_tasks import get_db_path
+    entry = create_snapshot(get_db_path())
+    print(f"Sauvegarde créée: {entry['file']} ({entry['duration_ms']} ms, "
+          f"étape max {entry['max_step_ms']} ms, intégrité {'OK' if entry['verified'] else 'KO'})")
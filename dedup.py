@@ -0,0 +1,130 @@
+import re
+import zlib
+import hashlib
+import numpy as np
+
+# Paramètres MinHash / LSH : 16 bandes de 4 lignes, soit 64 fonctions de hachage
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Taille des n-grammes de caractères
+SHINGLE_SIZE = 5
+# Similarité (Jaccard estimée) à partir de laquelle deux tâches sont considérées comme proches
+SIMILARITY_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+# Coefficients fixes : les signatures stockées restent comparables d'une exécution à l'autre
+_rng = np.random.RandomState(42)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+# Fonction pour créer les tables de l'index de doublons
+def init_dedup(conn):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS task_fingerprints (
+            task_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL,
+            signature BLOB NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_hash ON task_fingerprints (content_hash)")
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS task_lsh_buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            task_id INTEGER NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets ON task_lsh_buckets (band, bucket)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_task ON task_lsh_buckets (task_id)")
+    conn.commit()
+
+# Fonction pour normaliser un texte (casse, espaces, ponctuation)
+def normalize_text(text):
+    if not text:
+        return ''
+    text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _task_text(task_name, description):
+    return f"{normalize_text(task_name)} | {normalize_text(description)}"
+
+# Fonction pour calculer l'empreinte exacte d'une tâche
+def content_hash(task_name, description):
+    return hashlib.sha256(_task_text(task_name, description).encode('utf-8')).hexdigest()
+
+# Fonction pour calculer la signature MinHash d'une tâche
+def minhash_signature(task_name, description):
+    text = _task_text(task_name, description)
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype=np.uint64)
+    # Toutes les permutations d'un coup : matrice (permutations x n-grammes)
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+# Fonction pour calculer les clés LSH (une par bande) d'une signature
+def lsh_buckets(signature):
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return buckets
+
+# Fonction pour ajouter une tâche à l'index (à appeler dans la transaction d'insertion)
+# `replace=True` pour réindexer une tâche déjà indexée (ses anciennes bandes sont supprimées)
+def index_task(conn, task_id, task_name, description, replace=False):
+    signature = minhash_signature(task_name, description)
+    conn.execute(
+        "INSERT OR REPLACE INTO task_fingerprints (task_id, content_hash, signature) VALUES (?, ?, ?)",
+        (task_id, content_hash(task_name, description), signature.tobytes())
+    )
+    if replace:
+        conn.execute("DELETE FROM task_lsh_buckets WHERE task_id = ?", (task_id,))
+    conn.executemany(
+        "INSERT INTO task_lsh_buckets (band, bucket, task_id) VALUES (?, ?, ?)",
+        [(band, bucket, task_id) for band, bucket in lsh_buckets(signature)]
+    )
+
+# Fonction pour indexer les tâches qui ne le sont pas encore (bases existantes)
+def build_dedup_index(conn):
+    init_dedup(conn)
+    rows = conn.execute('''
+        SELECT t.id, t.task_name, t.description
+        FROM tasks t
+        LEFT JOIN task_fingerprints f ON f.task_id = t.id
+        WHERE f.task_id IS NULL
+    ''').fetchall()
+    for task_id, task_name, description in rows:
+        index_task(conn, task_id, task_name, description)
+    conn.commit()
+    return len(rows)
+
+# Fonction pour rechercher les doublons exacts et proches d'une tâche
+def find_duplicates(conn, task_name, description, threshold=SIMILARITY_THRESHOLD):
+    exact = [row[0] for row in conn.execute(
+        "SELECT task_id FROM task_fingerprints WHERE content_hash = ?",
+        (content_hash(task_name, description),)
+    )]
+
+    # Candidats : tâches partageant au moins une bande LSH (recherches indexées, sans parcours de la table)
+    signature = minhash_signature(task_name, description)
+    candidates = set()
+    for band, bucket in lsh_buckets(signature):
+        candidates.update(row[0] for row in conn.execute(
+            "SELECT task_id FROM task_lsh_buckets WHERE band = ? AND bucket = ?",
+            (band, bucket)
+        ))
+    candidates.difference_update(exact)
+
+    near = []
+    for task_id in candidates:
+        row = conn.execute("SELECT signature FROM task_fingerprints WHERE task_id = ?", (task_id,)).fetchone()
+        if row is None:
+            continue
+        similarity = float(np.mean(np.frombuffer(row[0], dtype=np.uint32) == signature))
+        if similarity >= threshold:
+            near.append((task_id, similarity))
+    near.sort(key=lambda item: item[1], reverse=True)
+    return exact, near
@@ -1,8 +1,11 @@
 import sqlite3
+import sys
 from datetime import datetime
 import os
 import tempfile
 import streamlit as st
+from archive import init_archive
+from dedup import build_dedup_index, find_duplicates, index_task
 
 def get_db_path():
     if os.environ.get('STREAMLIT_SERVER_RUNNING'):
@@ -12,7 +15,7 @@ def get_db_path():
         # En local, utiliser le chemin normal
         return 'roadmap.db'
 
-def import_tasks():
+def import_tasks(on_duplicate="skip"):
     try:
         # Connexion à la base de données
         db_path = get_db_path()
@@ -32,6 +35,10 @@ def import_tasks():
             )
         ''')
 
+        # Colonne `completed_at` (et tables d'archive) nécessaires à l'insertion
+        init_archive(conn)
+        today = datetime.now().strftime('%Y-%m-%d')
+
         # Liste des tâches à importer
         tasks = [
             {
@@ -100,26 +107,70 @@ def import_tasks():
             }
         ]
 
-        # Vérifier si la table est vide avant d'insérer
-        c.execute("SELECT COUNT(*) FROM tasks")
-        if c.fetchone()[0] == 0:
-            # Insertion des tâches
-            for task in tasks:
-                c.execute('''
-                    INSERT INTO tasks (task_name, description, status, responsible, deadline, comments)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    task["task_name"],
-                    task["description"],
-                    task["status"],
-                    task["responsible"],
-                    task["deadline"],
-                    task["comments"]
-                ))
-            conn.commit()
-            print("Import des tâches terminé avec succès!")
-        else:
-            print("La base de données contient déjà des tâches. Import ignoré.")
+        # Insertion des tâches en ignorant les doublons exacts et proches déjà présents
+        build_dedup_index(conn)
+        inserted, skipped, merged, archived_matches = 0, 0, 0, 0
+        for task in tasks:
+            exact, near = find_duplicates(conn, task["task_name"], task["description"])
+            if exact:
+                skipped += 1
+                continue
+            if near:
+                # Les empreintes des tâches archivées sont conservées : seules les tâches encore
+                # dans `tasks` peuvent recevoir une fusion
+                near_ids = [task_id for task_id, _ in near]
+                active_ids = {row[0] for row in c.execute(
+                    f"SELECT id FROM tasks WHERE id IN ({', '.join('?' * len(near_ids))})",
+                    near_ids
+                )}
+                target_id = next((task_id for task_id in near_ids if task_id in active_ids), None)
+                if on_duplicate == "merge" and target_id is not None:
+                    # Mettre à jour la tâche existante la plus proche avec les valeurs importées
+                    c.execute('''
+                        UPDATE tasks
+                        SET status = COALESCE(?, status),
+                            responsible = COALESCE(?, responsible),
+                            deadline = COALESCE(?, deadline),
+                            comments = COALESCE(?, comments),
+                            completed_at = CASE WHEN LOWER(COALESCE(?, status)) = 'ok'
+                                                THEN COALESCE(completed_at, ?) END
+                        WHERE id = ?
+                    ''', (
+                        task["status"],
+                        task["responsible"],
+                        task["deadline"],
+                        task["comments"],
+                        task["status"],
+                        today,
+                        target_id
+                    ))
+                    if c.rowcount:
+                        merged += 1
+                        continue
+                if on_duplicate == "merge":
+                    # Doublon d'une tâche archivée : ignoré, et signalé
+                    archived_matches += 1
+                skipped += 1
+                continue
+            c.execute('''
+                INSERT INTO tasks (task_name, description, status, responsible, deadline, comments, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                task["task_name"],
+                task["description"],
+                task["status"],
+                task["responsible"],
+                task["deadline"],
+                task["comments"],
+                # Tâche importée déjà terminée : date de fin = deadline, à défaut le jour de l'import
+                (task["deadline"] or today) if (task["status"] or '').lower() == 'ok' else None
+            ))
+            index_task(conn, c.lastrowid, task["task_name"], task["description"])
+            inserted += 1
+        conn.commit()
+        print(f"Import des tâches terminé: {inserted} ajoutée(s), {merged} fusionnée(s), {skipped} doublon(s) ignoré(s).")
+        if archived_matches:
+            print(f"{archived_matches} doublon(s) de tâches archivées non fusionné(s) (ignoré(s)).")
 
     except Exception as e:
         print(f"Erreur lors de l'import des tâches: {str(e)}")
@@ -129,4 +180,5 @@ def import_tasks():
             conn.close()
 
 if __name__ == "__main__":
-    import_tasks() 
\ No newline at end of file
+    # `--merge` : mettre à jour les tâches proches existantes au lieu d'ignorer les doublons
+    import_tasks(on_duplicate="merge" if "--merge" in sys.argv[1:] else "skip")
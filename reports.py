@@ -0,0 +1,429 @@
+import sqlite3
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+import plotly.graph_objects as go
+
+# Dossier des rapports statiques (Roadmap, statistiques, tâches en retard)
+def get_report_dir():
+    return os.environ.get('ROADMAP_REPORT_DIR', 'reports')
+
+# Verrou pour qu'un seul rendu soit lancé par changement de données, quel que soit le nombre de lecteurs
+_render_lock = threading.Lock()
+
+def get_days_remaining(deadline):
+    if pd.isna(deadline):
+        return None
+    deadline_date = datetime.strptime(deadline, '%Y-%m-%d')
+    today = datetime.now().date()
+    if deadline_date.date() < today:
+        return None
+    return (deadline_date.date() - today).days
+
+# Fonction pour créer le compteur de version des données (incrémenté par des triggers)
+def init_data_version(conn):
+    c = conn.cursor()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    c.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tasks_version_{event.lower()}
+            AFTER {event} ON tasks
+            BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+        ''')
+    conn.commit()
+
+# Fonction pour lire la version courante des données
+def get_data_version(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            return conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+        except sqlite3.OperationalError:
+            # Table absente (base antérieure) : la créer une fois, sans écriture à chaque lecture
+            init_data_version(conn)
+            return conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()[0]
+    finally:
+        conn.close()
+
+# Couleurs et libellés des statuts sur la Roadmap
+ROADMAP_COLORS = {
+    'ok': '#007bff',       # Bleu pour les tâches terminées
+    'en cours': '#ffc107',  # Jaune pour les tâches en cours
+    'non démarré': '#28a745'  # Vert pour les tâches non démarrées
+}
+ROADMAP_STATUS_LABELS = {
+    'ok': "✅ Déployé",
+    'en cours': "🔄 En cours",
+    'non démarré': "⏳ En attente"
+}
+
+# Au-delà de ces durées (en jours), la Roadmap affiche des barres agrégées
+WEEKLY_AGGREGATION_DAYS = 180
+MONTHLY_AGGREGATION_DAYS = 730
+
+# Fonction pour créer les index utilisés par les requêtes par plage de deadlines
+def init_roadmap_index(conn):
+    c = conn.cursor()
+    c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks (deadline)")
+    tables = [row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    if 'tasks_archive' in tables:
+        c.execute("CREATE INDEX IF NOT EXISTS idx_tasks_archive_deadline ON tasks_archive (deadline)")
+    conn.commit()
+
+# Requête des tâches dont la deadline est dans la fenêtre (ensemble actif, avec ou sans l'archive)
+def _window_source(include_archive):
+    source = '''
+        SELECT id, task_name, description, status, responsible, deadline, comments
+        FROM tasks WHERE deadline BETWEEN ? AND ?
+    '''
+    if include_archive:
+        source += '''
+            UNION ALL
+            SELECT id, task_name, description, status, responsible, deadline, comments
+            FROM tasks_archive WHERE deadline BETWEEN ? AND ?
+        '''
+    return source
+
+def _window_params(start_date, end_date, include_archive):
+    params = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+    return params * 2 if include_archive else params
+
+# Fonction pour obtenir la première et la dernière deadline
+def get_deadline_bounds(db_path, include_archive=False):
+    source = "SELECT deadline FROM tasks"
+    if include_archive:
+        source += " UNION ALL SELECT deadline FROM tasks_archive"
+    conn = sqlite3.connect(db_path)
+    try:
+        min_deadline, max_deadline = conn.execute(
+            f"SELECT MIN(deadline), MAX(deadline) FROM ({source})"
+        ).fetchone()
+    finally:
+        conn.close()
+    if min_deadline is None:
+        return None, None
+    return (datetime.strptime(min_deadline, '%Y-%m-%d').date(),
+            datetime.strptime(max_deadline, '%Y-%m-%d').date())
+
+# Fonction pour compter les tâches dont la deadline est dans la fenêtre
+def count_tasks_in_window(db_path, start_date, end_date, include_archive=False):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT COUNT(*) FROM ({_window_source(include_archive)})",
+            _window_params(start_date, end_date, include_archive)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+# Fonction pour compter les tâches sans deadline (absentes de la timeline)
+def count_tasks_without_deadline(db_path, include_archive=False):
+    query = "SELECT COUNT(*) FROM tasks WHERE deadline IS NULL"
+    if include_archive:
+        query = f"SELECT ({query}) + (SELECT COUNT(*) FROM tasks_archive WHERE deadline IS NULL)"
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query).fetchone()[0]
+    finally:
+        conn.close()
+
+# Fonction pour charger une page de tâches dont la deadline est dans la fenêtre
+def load_tasks_in_window(db_path, start_date, end_date, limit, offset=0, include_archive=False):
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql_query(
+            f"{_window_source(include_archive)} ORDER BY deadline, id LIMIT ? OFFSET ?",
+            conn,
+            params=_window_params(start_date, end_date, include_archive) + (limit, offset)
+        )
+    finally:
+        conn.close()
+
+# Fonction pour choisir la granularité d'affichage selon la taille de la fenêtre
+def choose_granularity(start_date, end_date):
+    span = (end_date - start_date).days
+    if span > MONTHLY_AGGREGATION_DAYS:
+        return 'M'
+    if span > WEEKLY_AGGREGATION_DAYS:
+        return 'W'
+    return None
+
+# Fonction pour compter les tâches par période et par statut dans la fenêtre
+def load_window_aggregates(db_path, start_date, end_date, freq, include_archive=False):
+    conn = sqlite3.connect(db_path)
+    try:
+        # Agrégation par jour en SQL : au plus une ligne par jour et par statut
+        daily = pd.read_sql_query(
+            f'''
+                SELECT deadline, LOWER(status) AS status, COUNT(*) AS task_count
+                FROM ({_window_source(include_archive)})
+                GROUP BY deadline, LOWER(status)
+            ''',
+            conn,
+            params=_window_params(start_date, end_date, include_archive)
+        )
+    finally:
+        conn.close()
+    daily['period'] = pd.to_datetime(daily['deadline'], format='%Y-%m-%d').dt.to_period(freq).dt.start_time
+    return daily.groupby(['period', 'status'])['task_count'].sum().unstack(fill_value=0)
+
+# Fonction pour appliquer la mise en page commune aux graphiques de la Roadmap
+def _style_roadmap_figure(fig, start_date, end_date, yaxis_title):
+    today = datetime.now().date()
+    fig.update_layout(
+        title={
+            'text': "Timeline des Tâches",
+            'y':0.95,
+            'x':0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': {'size': 24, 'color': '#2E4053'}
+        },
+        xaxis_title="Dates",
+        yaxis_title=yaxis_title,
+        height=600,
+        template="plotly_white",
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            type='date',
+            tickformat='%d/%m/%Y',
+            tickangle=45,
+            gridcolor='rgba(0,0,0,0.1)',
+            zerolinecolor='rgba(0,0,0,0.1)',
+            range=[start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')]
+        ),
+        yaxis=dict(
+            gridcolor='rgba(0,0,0,0.1)',
+            zerolinecolor='rgba(0,0,0,0.1)'
+        ),
+        margin=dict(l=20, r=20, t=100, b=20)
+    )
+
+    # Ajouter une ligne verticale pour la date d'aujourd'hui
+    if start_date <= today <= end_date:
+        fig.add_shape(
+            type='line',
+            x0=today.strftime('%Y-%m-%d'),
+            x1=today.strftime('%Y-%m-%d'),
+            y0=0,
+            y1=1,
+            yref='paper',
+            line=dict(dash='dash', color='red')
+        )
+        fig.add_annotation(
+            x=today.strftime('%Y-%m-%d'),
+            y=1,
+            yref='paper',
+            text="Aujourd'hui",
+            showarrow=False,
+            xanchor='left',
+            font=dict(size=12, color="red"),
+            bgcolor="white",
+            bordercolor="red",
+            borderwidth=1
+        )
+    return fig
+
+# Fonction pour construire le graphique Gantt de la Roadmap
+def build_roadmap_figure(df, start_date=None, end_date=None):
+    today = datetime.now().date()
+    deadlines = pd.to_datetime(df['deadline'], format='%Y-%m-%d', errors='coerce')
+
+    # Sans fenêtre explicite, couvrir toutes les deadlines (+30 jours pour la visualisation)
+    if start_date is None:
+        start_date = deadlines.min().date() if deadlines.notna().any() else today
+    if end_date is None:
+        end_date = (deadlines.max().date() if deadlines.notna().any() else start_date) + timedelta(days=30)
+
+    # Le schéma ne contient pas de date de début : chaque tâche est un repère placé sur sa deadline,
+    # plutôt qu'une barre dont la longueur dépendrait du bord de la fenêtre. Les tâches sans deadline
+    # ne peuvent pas être placées sur l'axe des dates.
+    tasks = df.assign(deadline_date=deadlines).dropna(subset=['deadline_date']).sort_values(by='deadline')
+    task_status = tasks['status'].str.lower()
+    overdue = (task_status != 'ok') & (tasks['deadline_date'] < pd.Timestamp(today))
+
+    fig = go.Figure()
+    for status_key, color in ROADMAP_COLORS.items():
+        if status_key == 'non démarré':
+            # Couleur par défaut pour les autres statuts
+            mask = ~task_status.isin(['ok', 'en cours'])
+        else:
+            mask = task_status == status_key
+        if not mask.any():
+            continue
+        group = tasks[mask]
+        hover_texts = []
+        for (_, task), group_status in zip(group.iterrows(), task_status[mask]):
+            days_remaining = get_days_remaining(task['deadline'])
+            status_text = ROADMAP_STATUS_LABELS.get(group_status, "⚠️ En retard")
+            if group_status == 'ok':
+                progress_text = "Tâche terminée"
+            else:
+                progress_text = f"Jours restants: {days_remaining}" if days_remaining is not None else "En retard"
+            hover_texts.append(
+                f"<b>{task['task_name']}</b><br>"
+                f"Deadline: {task['deadline']}<br>"
+                f"Responsable: {task['responsible']}<br>"
+                f"Statut: {status_text}<br>"
+                f"{progress_text}"
+            )
+        # Une trace par statut plutôt qu'une trace par tâche ; les tâches ouvertes en retard sont cerclées de rouge
+        fig.add_trace(go.Scatter(
+            x=group['deadline'],
+            y=group['task_name'],
+            mode='markers',
+            name=ROADMAP_STATUS_LABELS[status_key],
+            marker=dict(
+                symbol='diamond',
+                size=14,
+                color=color,
+                line=dict(
+                    width=overdue[mask].map({True: 3, False: 1}).tolist(),
+                    color=overdue[mask].map({True: 'red', False: 'white'}).tolist()
+                )
+            ),
+            hovertext=hover_texts,
+            hovertemplate="%{hovertext}<extra></extra>"
+        ))
+
+    _style_roadmap_figure(fig, start_date, end_date, "Tâches")
+    fig.update_layout(showlegend=False)
+    # Les tâches dans l'ordre des deadlines, de haut en bas
+    fig.update_yaxes(categoryorder='array', categoryarray=list(tasks['task_name'])[::-1])
+
+    # Ajouter une légende pour les statuts
+    fig.add_annotation(
+        x=0.5,
+        y=1.1,
+        xref="paper",
+        yref="paper",
+        text="<b>Légende:</b> ✅ Déployé | 🔄 En cours | ⏳ En attente | ⚠️ En retard",
+        showarrow=False,
+        font=dict(size=12, color="#2E4053"),
+        bgcolor="white",
+        bordercolor="#2E4053",
+        borderwidth=1,
+        borderpad=4
+    )
+
+    return fig
+
+# Fonction pour construire la Roadmap agrégée (nombre de deadlines par semaine ou par mois)
+def build_aggregated_figure(aggregates, start_date, end_date, freq):
+    fig = go.Figure()
+    for status_key, color in ROADMAP_COLORS.items():
+        if status_key not in aggregates.columns:
+            continue
+        fig.add_trace(go.Bar(
+            x=aggregates.index,
+            y=aggregates[status_key],
+            name=ROADMAP_STATUS_LABELS[status_key],
+            marker_color=color,
+            hovertemplate="%{x|%d/%m/%Y}<br>%{y} tâche(s)<extra></extra>"
+        ))
+    # Statuts inattendus regroupés dans une seule série
+    others = aggregates.drop(columns=[c for c in ROADMAP_COLORS if c in aggregates.columns])
+    if not others.empty:
+        fig.add_trace(go.Bar(
+            x=aggregates.index,
+            y=others.sum(axis=1),
+            name="⚠️ Autres",
+            marker_color='#6c757d'
+        ))
+    _style_roadmap_figure(fig, start_date, end_date, f"Deadlines par {'semaine' if freq == 'W' else 'mois'}")
+    fig.update_layout(barmode='stack', showlegend=True)
+    return fig
+
+# Fonction pour calculer les statistiques affichées sous la Roadmap
+def compute_roadmap_stats(df):
+    return {
+        'completed': int((df['status'].str.lower() == 'ok').sum()),
+        'in_progress': int((df['status'] == 'en cours').sum()),
+        'not_started': int((df['status'] == 'non démarré').sum()),
+        'overdue': len(get_overdue_tasks(df))
+    }
+
+# Fonction pour lister les tâches en retard
+def get_overdue_tasks(df):
+    today = datetime.now().date()
+    overdue = df[(df['status'].str.lower() != 'ok') & (df['deadline'].apply(lambda x: pd.notna(x) and datetime.strptime(x, '%Y-%m-%d').date() < today))]
+    return overdue.sort_values(by='deadline')[['id', 'task_name', 'responsible', 'deadline', 'status']]
+
+# Fonction pour générer les rapports statiques (HTML + JSON) de la Roadmap
+def generate_report(db_path, report_dir=None):
+    report_dir = report_dir or get_report_dir()
+    os.makedirs(report_dir, exist_ok=True)
+    version = get_data_version(db_path)
+
+    conn = sqlite3.connect(db_path)
+    df = pd.read_sql_query("SELECT * FROM tasks", conn)
+    try:
+        archived_completed = conn.execute("SELECT COALESCE(SUM(task_count), 0) FROM archive_rollups").fetchone()[0]
+    except sqlite3.OperationalError:
+        archived_completed = 0
+    conn.close()
+
+    fig = build_roadmap_figure(df)
+    stats = compute_roadmap_stats(df)
+    stats['completed'] += archived_completed
+    report = {
+        'data_version': version,
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'stats': stats,
+        'overdue': get_overdue_tasks(df).to_dict(orient='records')
+    }
+
+    # Écriture dans des fichiers temporaires puis renommage, pour ne jamais servir un rapport incomplet
+    html_path = os.path.join(report_dir, 'roadmap.html')
+    fig.write_html(html_path + '.tmp', include_plotlyjs='cdn', full_html=True)
+    os.replace(html_path + '.tmp', html_path)
+    json_path = os.path.join(report_dir, 'report.json')
+    with open(json_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(json_path + '.tmp', json_path)
+    return report
+
+# Fonction pour lire le dernier rapport généré
+def load_report(report_dir=None):
+    report_dir = report_dir or get_report_dir()
+    json_path = os.path.join(report_dir, 'report.json')
+    if not os.path.exists(json_path):
+        return None
+    with open(json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# Un rapport est à jour s'il correspond à la version des données et à la date du jour
+# (retards et ligne "Aujourd'hui" dépendent de la date, même sans écriture)
+def _is_report_fresh(report, version):
+    today = datetime.now().strftime('%Y-%m-%d')
+    return report is not None and report['data_version'] == version and report['generated_at'][:10] == today
+
+# Fonction pour obtenir un rapport à jour : un seul rendu par changement de données ou de jour
+def ensure_report(db_path, report_dir=None):
+    report_dir = report_dir or get_report_dir()
+    version = get_data_version(db_path)
+    report = load_report(report_dir)
+    if _is_report_fresh(report, version):
+        return report
+    with _render_lock:
+        # Un autre lecteur a peut-être déjà régénéré le rapport pendant l'attente du verrou
+        report = load_report(report_dir)
+        if _is_report_fresh(report, version):
+            return report
+        return generate_report(db_path, report_dir)
+
+if __name__ == "__main__":
+    from import_tasks import get_db_path
+    report = generate_report(get_db_path())
+    print(f"Rapport généré (version {report['data_version']}) dans {get_report_dir()}")
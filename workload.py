@@ -0,0 +1,76 @@
+import re
+import sqlite3
+from datetime import datetime
+import pandas as pd
+
+# Séparateurs rencontrés dans la colonne `responsible` ("Youness/ salma/mehdi", "Mehdi, Salma"...)
+ASSIGNEE_SEPARATOR = re.compile(r'\s*(?:[/,;&+]|\bet\b)\s*', re.IGNORECASE)
+
+# Cache des chaînes `responsible` déjà analysées : chaque valeur distincte n'est découpée qu'une fois
+_assignee_cache = {}
+
+# Fonction pour découper une chaîne `responsible` en liste de personnes normalisées
+def parse_assignees(responsible):
+    if responsible is None or pd.isna(responsible):
+        return ()
+    cached = _assignee_cache.get(responsible)
+    if cached is None:
+        names = (name.strip() for name in ASSIGNEE_SEPARATOR.split(responsible))
+        # Dédoublonnage en conservant l'ordre, noms normalisés ("salma" -> "Salma")
+        cached = tuple(dict.fromkeys(name.title() for name in names if name))
+        _assignee_cache[responsible] = cached
+    return cached
+
+# Fonction pour obtenir une ligne par couple (tâche, personne)
+def explode_assignees(df):
+    # Analyse uniquement des valeurs distinctes, puis diffusion vectorisée sur toutes les lignes
+    values = df['responsible'].dropna().unique()
+    parsed = pd.Series([parse_assignees(value) for value in values], index=values, dtype=object)
+    assignments = df.assign(person=df['responsible'].map(parsed)).explode('person')
+    return assignments[assignments['person'].notna()]
+
+# Fonction pour lister les personnes présentes dans les données
+def get_people(db_path, include_archive=False):
+    conn = sqlite3.connect(db_path)
+    query = "SELECT DISTINCT responsible FROM tasks"
+    if include_archive:
+        query += " UNION SELECT DISTINCT responsible FROM tasks_archive"
+    rows = conn.execute(query).fetchall()
+    conn.close()
+    people = set()
+    for (responsible,) in rows:
+        people.update(parse_assignees(responsible))
+    return sorted(people)
+
+# Fonction pour filtrer les tâches assignées à au moins une des personnes données
+def filter_by_people(df, people):
+    assignments = explode_assignees(df)
+    task_ids = assignments.loc[assignments['person'].isin(people), 'id'].unique()
+    return df[df['id'].isin(task_ids)]
+
+# Fonction pour calculer la charge de travail par personne
+def compute_workload(df, today=None):
+    today = pd.Timestamp(today or datetime.now().date())
+    assignments = explode_assignees(df)
+    assignments = assignments[assignments['status'].str.lower() != 'ok']
+    deadlines = pd.to_datetime(assignments['deadline'], format='%Y-%m-%d', errors='coerce')
+    assignments = assignments.assign(
+        deadline=deadlines,
+        overdue=deadlines < today,
+        week=deadlines.dt.to_period('W').dt.start_time
+    )
+
+    summary = assignments.groupby('person').agg(
+        open_tasks=('id', 'size'),
+        overdue_tasks=('overdue', 'sum')
+    ).astype(int).sort_values(by=['open_tasks', 'overdue_tasks'], ascending=False)
+
+    # Nombre de deadlines ouvertes par personne et par semaine
+    weekly_load = (
+        assignments.dropna(subset=['week'])
+        .groupby(['person', 'week'])
+        .size()
+        .unstack(fill_value=0)
+        .reindex(summary.index, fill_value=0)
+    )
+    return summary, weekly_load